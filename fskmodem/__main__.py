@@ -32,8 +32,8 @@ Try `python -m fskmodem --help` for command line switch options.
 #TODO
 # - subprocess call for external ptt on, off, and toggle scripts, script paths supplied via args
 
+import re
 import sys
-import time
 import argparse
 import threading
 
@@ -45,79 +45,124 @@ class HDLC:
     FLAG = 0x7E
     ESC = 0x7D
     ESC_MASK = 0x20
+    FLAG_BYTES = bytes([FLAG])
+    ESC_BYTES = bytes([ESC])
+    # escape sequences for the bytes that must be escaped
+    ESC_ESCAPED = bytes([ESC, ESC^ESC_MASK])
+    FLAG_ESCAPED = bytes([ESC, FLAG^ESC_MASK])
+    # original byte for each escaped byte following ESC
+    UNESCAPED = {
+        bytes([ESC^ESC_MASK]): bytes([ESC]),
+        bytes([FLAG^ESC_MASK]): bytes([FLAG])
+    }
+    UNESCAPE_PATTERN = re.compile(re.escape(bytes([ESC])) + b'(.?)', re.DOTALL)
 
     @staticmethod
     def escape(data):
-        data = data.replace(bytes([HDLC.ESC]), bytes([HDLC.ESC, HDLC.ESC^HDLC.ESC_MASK]))
-        data = data.replace(bytes([HDLC.FLAG]), bytes([HDLC.ESC, HDLC.FLAG^HDLC.ESC_MASK]))
+        # escape ESC first so the ESC bytes added by escaping FLAG are not escaped again
+        data = data.replace(HDLC.ESC_BYTES, HDLC.ESC_ESCAPED)
+        data = data.replace(HDLC.FLAG_BYTES, HDLC.FLAG_ESCAPED)
         return data
 
+    @staticmethod
+    def unescape(data):
+        # single pass over data, each escape sequence is replaced by the original byte
+        return HDLC.UNESCAPE_PATTERN.sub(lambda match: HDLC.UNESCAPED.get(match.group(1), match.group(1)), data)
+
 
-def _write_stdout(data, confidence):
-    sys.stdout.write(data)
-    sys.stdout.flush()
+def _write_stdout(data):
+    # each callback is a complete message, write and flush it once without text encoding
+    sys.stdout.buffer.write(data)
+    sys.stdout.buffer.flush()
 
 def _read_stdin():
     global modem
     global EOM # end of message
-    data_buffer = ''
+    eom = EOM.encode('utf-8')
+    data_buffer = bytearray()
+    # reused for every read to avoid allocating a bytes object per chunk
+    read_buffer = bytearray(65536)
+    read_view = memoryview(read_buffer)
     
     while modem.online:
-        byte = sys.stdin.read(1)
+        # returns as soon as any data is available
+        size = sys.stdin.buffer.readinto1(read_buffer)
 
-        if len(byte) == 0:
+        if size == 0:
             # EOL reached, pipe closed
             modem.stop()
             break
 
-        data_buffer += byte
+        data_buffer += read_view[:size]
+        end = data_buffer.find(eom)
+
+        # send each complete message in the buffer
+        while end != -1:
+            if end <= modem.MTU:
+                modem.send_bytes(bytes(data_buffer[:end]))
+
+            # remove message from buffer in place
+            del data_buffer[:end + len(eom)]
+            end = data_buffer.find(eom)
 
         if len(data_buffer) > modem.MTU:
-            data_buffer = ''
-        elif len(data_buffer) >= 2 and data_buffer[-2:] == EOM:
-            modem.send(data_buffer[:-2])
-            data_buffer = ''
+            data_buffer = bytearray()
 
-def _rns_write_stdout(data, confidence):
-    data = bytes([HDLC.FLAG]) + HDLC.escape(data) + bytes([HDLC.FLAG])
+def _rns_write_stdout(data):
+    data = HDLC.FLAG_BYTES + HDLC.escape(data) + HDLC.FLAG_BYTES
     sys.stdout.buffer.write(data)
     sys.stdout.buffer.flush()
 
+def _run_reader(reader):
+    global modem
+    try:
+        reader()
+    finally:
+        # stop the modem if the reader fails (ex. transmit subprocess failed to start) so the CLI exits
+        if modem.online:
+            modem.stop()
+
 def _rns_read_stdin():
     global modem
     in_frame = False
-    escape = False
-    data_buffer = b''
+    flag = HDLC.FLAG_BYTES
+    data_buffer = bytearray()
+    # reused for every read to avoid allocating a bytes object per chunk
+    read_buffer = bytearray(65536)
+    read_view = memoryview(read_buffer)
     
     while modem.online:
-        byte = sys.stdin.buffer.read(1)
+        # returns as soon as any data is available
+        size = sys.stdin.buffer.readinto1(read_buffer)
 
-        if len(byte) == 0:
+        if size == 0:
             # EOL reached, pipe closed
             modem.stop()
             break
-        
-        byte = ord(byte)
-
-        if in_frame and byte == HDLC.FLAG:
-            in_frame = False
-            modem.send_bytes(data_buffer)
 
-        elif byte == HDLC.FLAG:
-            in_frame = True
-            data_buffer = b''
+        start = 0
+        end = read_buffer.find(flag, 0, size)
 
-        elif in_frame and len(data_buffer) < modem.MTU:
-            if byte == HDLC.ESC:
-                escape = True
+        # escaped frame data is collected as-is between flags, frame state is kept across reads
+        while end != -1:
+            if in_frame:
+                # closing flag, unescape and send the complete frame
+                data_buffer += read_view[start:end]
+                modem.send_bytes(HDLC.unescape(data_buffer)[:modem.MTU])
+                in_frame = False
             else:
-                if escape:
-                    if byte == HDLC.FLAG ^ HDLC.ESC_MASK:
-                        byte = HDLC.FLAG
-                    if byte == HDLC.ESC ^ HDLC.ESC_MASK:
-                        byte = HDLC.ESC
-                    escape = False
-                data_buffer += bytes([byte])
+                in_frame = True
+                data_buffer.clear()
+
+            start = end + 1
+            end = read_buffer.find(flag, start, size)
+
+        if in_frame:
+            # partial frame, wait for the next chunk
+            data_buffer += read_view[start:size]
+
+        # an escaped frame of MTU bytes is at most twice as long
+        del data_buffer[2 * modem.MTU:]
 
 
 if __name__ == '__main__':
@@ -185,11 +230,11 @@ if __name__ == '__main__':
     if args.rns:
         # use RNS packet framing and bytes data
         modem.set_rx_callback_bytes(_rns_write_stdout)
-        thread = threading.Thread(target=_rns_read_stdin)
+        thread = threading.Thread(target=_run_reader, args=(_rns_read_stdin,))
     else:
-        # use EOM and string data
-        modem.set_rx_callback(_write_stdout)
-        thread = threading.Thread(target=_read_stdin)
+        # use EOM and bytes data
+        modem.set_rx_callback_bytes(_write_stdout)
+        thread = threading.Thread(target=_run_reader, args=(_read_stdin,))
 
     thread.daemon = True
     thread.start()
@@ -198,10 +243,9 @@ if __name__ == '__main__':
         print('Press Ctrl+C to exit...')
 
     # modem is stopped when EOF reached on stdin pipe
-    while modem.online:
-        try:
-            time.sleep(0.25)
-        except KeyboardInterrupt:
-            print()
-            break
+    try:
+        # block until the modem is stopped
+        modem._stopped.wait()
+    except KeyboardInterrupt:
+        print()
 
@@ -48,15 +48,23 @@ See the [minimodem manpage](http://www.whence.com/minimodem/minimodem.1.html) fo
 '''
 
 import os
+import re
 import sys
 import time
+import queue
 import random
-import atexit
 import shutil
+import weakref
+import selectors
 import threading
+import traceback
 import subprocess
 from subprocess import PIPE, CalledProcessError, SubprocessError
 
+# pipe capacity can only be set on Linux
+if sys.platform.startswith('linux'):
+    import fcntl
+
 
 class HDLC:
     '''Defines packet framing flags similar to HDLC or PPP.
@@ -85,7 +93,14 @@ class FSKBase:
         mark (int): Mark frequency in Hz, defaults to None
         space (int): Space frequency in Hz, defaults to None
         online (bool): True if subprocess is running, False otherwise
+        PIPE_SIZE (int): Requested capacity in bytes of the subprocess pipes (default: 1 MiB, Linux only)
     '''
+
+    PIPE_SIZE = 1024 * 1024
+
+    # full file path for the minimodem executable, shared by all instances once found
+    _exec_path = None
+
     def __init__(self, mode, alsa_dev=None, baudmode=300, sync_byte=None, confidence=None, mark=None, space=None, start=True):
         '''Initialize FSKBase class instance.
         
@@ -114,39 +129,41 @@ class FSKBase:
         self.space = space
         self.online = False
         self._process = None
-        self._shell_cmd = None
+        self._argv = None
 
-        # get full file path for minimodem executable
-        exec_path = shutil.which('minimodem')
+        # get full file path for minimodem executable, only search PATH until found
+        if FSKBase._exec_path is None:
+            FSKBase._exec_path = shutil.which('minimodem')
+
+        exec_path = FSKBase._exec_path
         
         if exec_path is None:
             # minimodem not installed
             raise ProcessLookupError('minimodem application not installed, try: sudo apt install minimodem')
 
-        # configure minimodem comand line switches
-        switch_alsa_dev = None
-        switch_sync_byte = None
-        switch_confidence = None
-        switch_mark = None
-        switch_space = None
-        switch_mode = '--{}'.format(self.mode)
-        switch_filter = '--print-filter'
+        # configure minimodem comand line switches, each switch value is a separate argument
+        switch_alsa_dev = []
+        switch_sync_byte = []
+        switch_confidence = []
+        switch_mark = []
+        switch_space = []
+        switch_mode = ['--{}'.format(self.mode)]
+        switch_filter = ['--print-filter']
 
         if self.alsa_dev is not None:
-            switch_alsa_dev = '--alsa={}'.format(self.alsa_dev)
+            switch_alsa_dev = ['--alsa={}'.format(self.alsa_dev)]
         if self.sync_byte is not None:
-            switch_sync_byte = '--sync-byte {}'.format(self.sync_byte)
+            switch_sync_byte = ['--sync-byte', str(self.sync_byte)]
         if self.confidence is not None:
-            switch_confidence = '--confidence {}'.format(self.confidence)
+            switch_confidence = ['--confidence', str(self.confidence)]
         if self.mark is not None:
-            switch_mark = '--mark {}'.format(self.mark)
+            switch_mark = ['--mark', str(self.mark)]
         if self.space is not None:
-            switch_space = '--space {}'.format(self.space)
+            switch_space = ['--space', str(self.space)]
 
-        switches = [switch_mode, switch_alsa_dev, switch_confidence, switch_sync_byte, switch_filter, switch_mark, switch_space]
-        switches = [switch for switch in switches if switch is not None]
+        switches = switch_mode + switch_alsa_dev + switch_confidence + switch_sync_byte + switch_filter + switch_mark + switch_space
         # note from minimodem docs: confidence, sync byte, quiet, and print filter are ignored in tx mode
-        self._shell_cmd = '{} {} {}'.format(exec_path, ' '.join(switches), self.baudmode)
+        self._argv = [exec_path] + switches + [self.baudmode]
 
         if start:
             self.start()
@@ -156,41 +173,47 @@ class FSKBase:
         if self.online:
             return
             
-        # create subprocess with pipes for interaction with child process
-        self._process = subprocess.Popen(self._shell_cmd, shell=True, bufsize=-1, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+        # create subprocess with pipes for interaction with child process, run minimodem directly without a shell
+        self._process = subprocess.Popen(self._argv, bufsize=-1, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+
+        # enlarge pipes (default 64 KiB) so that bursts do not block minimodem or the modem loops
+        if sys.platform.startswith('linux'):
+            # F_SETPIPE_SZ is only defined by the fcntl module on Python 3.10+, 1031 is the Linux value
+            for pipe in (self._process.stdin, self._process.stdout, self._process.stderr):
+                try:
+                    fcntl.fcntl(pipe.fileno(), getattr(fcntl, 'F_SETPIPE_SZ', 1031), FSKBase.PIPE_SIZE)
+                except OSError:
+                    # not supported or over the system limit, keep the default size
+                    pass
+
+        # check if process failed with exit code, returns as soon as the process exits
+        try:
+            exit_code = self._process.wait(timeout=0.1)
+        except subprocess.TimeoutExpired:
+            # process still running after 100 ms
+            exit_code = None
 
-        time.sleep(0.1)
-        
-        # check if process failed with exit code (returns None if running)
-        exit_code = self._process.poll()
         if exit_code != None:
             raise SubprocessError('{} subprocess failed with exit code {}, check minimodem settings (ex. ALSA device)'.format(self.mode.title(), exit_code))
 
         self.online = True
 
     def stop(self):
-        '''Stop minimodem subprocess.'''
+        '''Stop minimodem subprocess.
+
+        Blocks until the subprocess exits, up to 5 seconds before the subprocess is killed.
+        '''
         self.online = False
         # try to terminate normally
         self._process.terminate()
-        # use a thread to communicate non-blocking-ly
-        comm_thread = threading.Thread(target=self._process.communicate)
-        comm_thread.daemon = True
-        comm_thread.start()
-        
-        comm_start = time.time()
-        comm_timeout = 5
-        # manual timeout
-        while time.time() < comm_start + comm_timeout:
-            time.sleep(1)
-
-        if self._process.poll() == None:
-            # if the process still hasn't stopped, try to kill it
+
+        try:
+            # returns as soon as the process exits
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # if the process still hasn't stopped, kill it
             self._process.kill()
-            # use a thread to communicate non-blocking-ly
-            comm_thread = threading.Thread(target=self._process.communicate)
-            comm_thread.daemon = True
-            comm_thread.start()
+            self._process.wait()
 
 
 class FSKReceive(FSKBase):
@@ -214,31 +237,31 @@ class FSKReceive(FSKBase):
         self.mode = 'rx'
         super().__init__(self.mode, **kwargs)
 
-    def receive(self, size=1):
+    def receive(self, size=4096):
         '''Receive data from minimodem subprocess.
 
-        Reading from the subprocess.Popen.stdout pipe is blocking until the specified number of bytes is available.
+        Reading from the subprocess.Popen.stdout pipe is blocking until data is available, and returns as soon as any data is available.
 
         Args:
-            size (int): Number of bytes to read from the subprocess pipe
+            size (int): Maximum number of bytes to read from the subprocess pipe, defaults to 4096
 
         Returns:
-            bytes: Received byte string of specified length
+            bytes: Received byte string of up to the specified length
         '''
-        return self._process.stdout.read(size)
+        return self._process.stdout.read1(size)
 
-    def get_stderr(self, size=1):
+    def get_stderr(self, size=4096):
         '''Get stderr data from minimodem subprocess.
 
-        Reading from the subprocess.Popen.stderr pipe is blocking until the specified number of bytes is available.
+        Reading from the subprocess.Popen.stderr pipe is blocking until data is available, and returns as soon as any data is available.
 
         Args:
-            size (int): Number of bytes to read from the subprocess pipe
+            size (int): Maximum number of bytes to read from the subprocess pipe, defaults to 4096
 
         Returns:
-            bytes: Received byte string of specified length
+            bytes: Received byte string of up to the specified length
         '''
-        return self._process.stderr.read(size)
+        return self._process.stderr.read1(size)
 
 
 class FSKTransmit(FSKBase):
@@ -262,16 +285,32 @@ class FSKTransmit(FSKBase):
         self.mode = 'tx'
         super().__init__(self.mode, **kwargs)
 
+        # encode the sync byte once, prepended to all sent data
+        if self.sync_byte is not None:
+            self._sync_byte = self.sync_byte.encode('utf-8')
+        else:
+            self._sync_byte = b''
+
     def send(self, data):
         '''Send data to the minimodem subprocess.
 
         Args:
             data (int): byte string to send to the subprocess pipe
         '''
-        if self.sync_byte is not None:
-            data = self.sync_byte.encode('utf-8') + data
+        self._process.stdin.write(self._sync_byte + data)
+        self._process.stdin.flush()
+
+    def send_many(self, data):
+        '''Send multiple byte strings to the minimodem subprocess with a single write.
+
+        Args:
+            data (list): byte strings to send to the subprocess pipe, in order
+        '''
+        if len(data) == 0:
+            return
 
-        self._process.stdin.write(data)
+        # prepend the sync byte to each byte string
+        self._process.stdin.write(self._sync_byte + self._sync_byte.join(data))
         self._process.stdin.flush()
 
 
@@ -301,6 +340,9 @@ class Modem:
         'uic-ground': 600
     }
 
+    # card and device numbers in an 'arecord -l' or 'aplay -l' device line (ex. 'card 2: ... device 0: ...')
+    _ALSA_DEVICE_PATTERN = re.compile(r'card\s+(\d+):.*?device\s+(\d+):')
+
     @staticmethod
     def get_alsa_device(device_desc, device_type='input'):
         '''Get ALSA device string based on device description text.
@@ -324,27 +366,15 @@ class Modem:
         else:
             raise Exception('Unknown device type: {}'.format(device_type))
     
-        alsa_dev = None
         # get audio device descriptions
-        alsa_devs = subprocess.check_output(alsa_cmd).decode('utf-8').split('\n')
+        alsa_devs = subprocess.check_output(alsa_cmd).decode('utf-8')
     
-        for line in alsa_devs:
+        for line in alsa_devs.splitlines():
             if device_desc in line:
-                # capture the card number
-                start = 'card'
-                end = ':'
-                start_index = line.find(start) + len(start)
-                end_index = line.find(end, start_index)
-                card = line[start_index:end_index].strip()
-                
-                # capture the device number
-                start = 'device'
-                end = ':'
-                start_index = line.find(start) + len(start)
-                end_index = line.find(end, start_index)
-                device = line[start_index:end_index].strip()
-                
-                return '{},{}'.format(card, device)
+                # capture the card and device numbers
+                match = Modem._ALSA_DEVICE_PATTERN.search(line)
+                if match is not None:
+                    return '{},{}'.format(match.group(1), match.group(2))
 
     def __init__(self, search_alsa_in=None, search_alsa_out=None, alsa_in=None, alsa_out=None, baudmode=300, sync_byte=None, confidence=1.5, mark=None, space=None, start=True):
         '''Initialize Modem class instance.
@@ -373,6 +403,7 @@ class Modem:
         Raises:
             OSError: No ALSA audio device found containing specified search text
             ValueError: Unable to determine baudrate from specified baudmode
+            SubprocessError: Receive subprocess failed to start, transmit subprocess start failures are raised by the first *send* or *send_bytes* call instead
         '''
         if search_alsa_in is not None:
             # get first alsa card/device containing specified text
@@ -402,11 +433,29 @@ class Modem:
         self._rx_callback = None
         self._rx_callback_bytes = None
         self._toggle_ptt_callback = None
+        # multiplier necessary to align calculated and actual transmit duration
+        self._tx_calibration = 1.3
+        # last channel activity (monotonic timestamps), used to skip the tx backoff on a quiet channel
+        self._last_tx_end = 0
+        self._last_carrier_seen = 0
         self._rx_confidence = 0
         self._rx_confidence_timestamp = 0
-        self._tx_buffer = []
+        self._rx_buffer = bytearray()
+        self._rx_scan = 0
+        self._rx_pending = []
+        self._stderr_buffer = bytearray()
+        self._tx_buffer = queue.Queue()
+        # held while the transmit subprocess is started or restarted, so stop() sees either a started subprocess or an offline modem
+        self._tx_lock = threading.Lock()
         self._rx = None
         self._tx = None
+        self._callback_buffer = queue.Queue()
+        self._finalizer = None
+        # set when the modem is stopped
+        self._stopped = threading.Event()
+        # set while no carrier is detected
+        self._carrier_clear = threading.Event()
+        self._carrier_clear.set()
 
         # determine baudrate based on specified baudmode
         #TODO does not support float baudrates
@@ -417,27 +466,44 @@ class Modem:
         else:
             raise ValueError('Unable to determine baudrate from baudmode: {}'.format(self.baudmode))
 
-        # configure exit handler
-        atexit.register(self.stop)
-
         if start:
             self.start()
 
     def start(self):
-        '''Start modem monitoring loops and subprocesses.'''
-        self._rx = FSKReceive(alsa_dev=self.alsa_in, baudmode=self.baudmode, sync_byte=self.sync_byte, confidence=self.confidence, mark=self.mark, space=self.space)
-        self._tx = FSKTransmit(alsa_dev=self.alsa_out, baudmode=self.baudmode, sync_byte=self.sync_byte, confidence=self.confidence, mark=self.mark, space=self.space)
-        self.online = True
+        '''Start modem monitoring loops and subprocesses.
 
-        # start the receive loop as a thread since reads from the child process are blocking
-        rx_thread = threading.Thread(target=self._rx_loop)
-        rx_thread.daemon = True
-        rx_thread.start()
+        The receive subprocess is started immediately, the transmit subprocess is started when the first data is sent.
+        '''
+        if self._finalizer is not None:
+            # make sure subprocesses from a previous start have exited before opening the audio devices again
+            self._finalizer()
 
-        # start the stderr loop as a thread since reads from the child process are blocking
-        stderr_thread = threading.Thread(target=self._stderr_loop)
-        stderr_thread.daemon = True
-        stderr_thread.start()
+        self._rx = FSKReceive(alsa_dev=self.alsa_in, baudmode=self.baudmode, sync_byte=self.sync_byte, confidence=self.confidence, mark=self.mark, space=self.space)
+        # the transmit subprocess is started when data is first sent
+        self._tx = FSKTransmit(alsa_dev=self.alsa_out, baudmode=self.baudmode, sync_byte=self.sync_byte, confidence=self.confidence, mark=self.mark, space=self.space, start=False)
+        # stop the subprocesses at exit or garbage collection, without keeping a reference to this instance
+        self._finalizer = weakref.finalize(self, Modem._stop_subprocesses, self._rx, self._tx)
+        self.online = True
+        self._stopped.clear()
+        # the new receive process has not detected carrier yet
+        self.carrier_sense = False
+        self._carrier_clear.set()
+        self._rx_buffer = bytearray()
+        self._rx_scan = 0
+        self._rx_pending = []
+        self._stderr_buffer = bytearray()
+        # reuse a callback thread instead of starting a thread per packet, a single worker delivers packets in order
+        self._callback_buffer = queue.Queue()
+
+        # start the callback loop as a daemon thread so a blocking callback does not prevent interpreter exit
+        callback_thread = threading.Thread(target=Modem._callback_loop, args=(self._callback_buffer,))
+        callback_thread.daemon = True
+        callback_thread.start()
+
+        # start the io loop as a thread to wait for data from the receive child process stdout and stderr pipes
+        io_thread = threading.Thread(target=self._io_loop)
+        io_thread.daemon = True
+        io_thread.start()
 
         # start the job loop to process data in the tx buffer
         job_thread = threading.Thread(target=self._tx_loop)
@@ -448,8 +514,12 @@ class Modem:
         '''Stop modem and subprocesses.'''
         self.online = False
 
+        with self._tx_lock:
+            # waits for a transmit subprocess start in progress
+            tx_started = self._tx is not None and self._tx.online
+
         # use a thread to stop the child process non-blocking-ly
-        if self._tx is not None:
+        if tx_started:
             stop_tx_thread = threading.Thread(target=self._tx.stop)
             stop_tx_thread.daemon = True
             stop_tx_thread.start()
@@ -459,6 +529,26 @@ class Modem:
             stop_rx_thread.daemon = True
             stop_rx_thread.start()
 
+        # wake the tx loop so it can exit without waiting for data or carrier
+        self._tx_buffer.put(None)
+        self._carrier_clear.set()
+        # set last, the exit finalizer still stops any subprocess the stop threads have not finished with
+        self._stopped.set()
+
+    @staticmethod
+    def _stop_subprocesses(*subprocesses):
+        '''Stop running minimodem subprocesses.
+
+        Used as a finalizer, so it must not reference the Modem instance. Blocks until the subprocesses exit, including subprocesses that Modem.stop is still stopping in the background.
+
+        Args:
+            subprocesses (fskmodem.FSKBase): FSKReceive and FSKTransmit instances to stop
+        '''
+        for fsk in subprocesses:
+            # FSKBase.stop clears online before the subprocess has exited, check the subprocess itself
+            if fsk._process is not None and fsk._process.poll() is None:
+                fsk.stop()
+
     def set_rx_callback(self, callback):
         '''Set incoming packet callback function.
             
@@ -514,6 +604,9 @@ class Modem:
 
         Args:
             data (str): data to send
+
+        Raises:
+            SubprocessError: transmit subprocess failed to start
         '''
         data = data.encode('utf-8')
         self.send_bytes(data)
@@ -528,12 +621,36 @@ class Modem:
 
         Raises:
             TypeError: specified data is not type bytes
+            SubprocessError: transmit subprocess failed to start
         '''
         if not isinstance(data, bytes):
             raise TypeError( 'Data must be of type bytes, {} given'.format( type(data) ) )
 
+        # start the transmit subprocess on first use, or again if it exited
+        self._start_tx()
+
         data = HDLC.START + data + HDLC.STOP
-        self._tx_buffer.append(data)
+        self._tx_buffer.put(data)
+
+    def _start_tx(self):
+        '''Start the transmit subprocess if it is not running.
+
+        A transmit subprocess that exited unexpectedly is stopped and started again.
+
+        Raises:
+            SubprocessError: transmit subprocess failed to start
+        '''
+        with self._tx_lock:
+            if not self.online:
+                # stopped, do not start a subprocess that stop() would not see
+                return
+
+            if self._tx.online and self._tx._process.poll() is not None:
+                # exited unexpectedly, clear online and reap the subprocess before restarting it
+                self._tx.stop()
+
+            if not self._tx.online:
+                self._tx.start()
 
     def _toggle_ptt(self):
         '''Toggle radio PTT via callback function.'''
@@ -543,30 +660,8 @@ class Modem:
 
             self._toggle_ptt_callback()
     
-    def _receive_next(self):
-        '''Get next byte from receive minimodem instance.
-
-        Always call this function from a thread since the underlying subprocess pipe read will not return until data is available.
-        Validation of the received byte is performed by attempting to decode the byte and catching any UnicodeDecodeError exceptions.
-
-        Returns:
-            bytes: Received byte string (may be  b'' if a decode error occured)
-        '''
-        data = self._rx.receive()
-
-        # capture characters that cannot be decoded (receiver noise)
-        try:
-            data.decode('utf-8')
-        except UnicodeDecodeError:
-            return b''
-        
-        if self._debug:
-            print(data.decode('utf-8'), sep='', end='', flush=True)
-
-        return data
-
     def _process_rx_callback(self, data, confidence):
-        '''Call rx callback functions via thread.
+        '''Call rx callback functions via the callback thread.
 
         If *str* and *bytes* callbacks are set, both callbacks will be called.
 
@@ -574,190 +669,346 @@ class Modem:
             data (bytes): received data
             confidence (float): receiver confidence near the time the data was received
         '''
+        text = None
+        if self._debug or self._rx_callback is not None:
+            # decode once for debug output and the str callback, undecodable bytes (receiver noise) are replaced
+            text = data.decode('utf-8', errors='replace')
+
         if self._debug:
-            print('\nRX: ' + data.decode('utf-8'))
+            print('\nRX: ' + text)
         
         if self._rx_callback_bytes is not None:
             # use bytes callback function
-            rx_bytes_thread = threading.Thread(target=self._rx_callback_bytes, args=data)
-            rx_bytes_thread.daemon = True
-            rx_bytes_thread.start()
+            self._callback_buffer.put((self._rx_callback_bytes, data))
             
         if self._rx_callback is not None:
-            # decode data before callback
-            data = data.decode('utf-8')
             # use str callback function
-            rx_thread = threading.Thread(target=self._rx_callback, args=(data, confidence))
-            rx_thread.daemon = True
-            rx_thread.start()
+            self._callback_buffer.put((self._rx_callback, text, confidence))
+
+    @staticmethod
+    def _callback_loop(callback_buffer):
+        '''Call rx callback functions in the order they were received.
 
-    def _rx_loop(self):
-        '''Receive incoming bytes into a buffer and find data packets.
+        Does not reference the Modem instance, so the instance can still be garbage collected while callbacks are queued.
 
-        The rx callback function is called once a complete packet is received.
+        Args:
+            callback_buffer (queue.Queue): callback function and argument tuples, None is put when no more callbacks will be queued
         '''
-        data_buffer = b''
-        max_data_buffer_len = 1024
+        while True:
+            # blocks until a callback is queued
+            callback = callback_buffer.get()
 
-        while self.online:
-            # blocks until next character received
-            data_buffer += self._receive_next()
-            
-            if HDLC.START in data_buffer:
-                if HDLC.STOP in data_buffer:
-                    # delimiters found, capture substring
-                    start = data_buffer.find(HDLC.START) + len(HDLC.START)
-                    end = data_buffer.find(HDLC.STOP, start)
-                    if end > start:
-                        data = data_buffer[start:end]
-                        # remove received data from buffer
-                        data_buffer = data_buffer[end + len(HDLC.STOP):]
-                        
-                        # under max packet length, receive data
-                        if len(data) <= self.MTU:
-                            # wait for confidence data to be available
-                            #TODO test timeout duration on a slow platform (i.e Raspberry Pi)
-                            if self._rx_confidence_timestamp == 0:
-                                timeout = time.time() + 0.1 # 100 ms
-                                while self._rx_confidence_timestamp == 0 and time.time() <= timeout:
-                                    time.sleep(0.001) # 1 millisecond
-
-                            self._process_rx_callback(data, self._rx_confidence)
-                            # reset confidence data to avoid reuse
-                            self._rx_confidence = 0
-                            self._rx_confidence_timestamp = 0
-
-                        else:
-                            # over max packet length, drop data
-                            pass
-                    else:
-                        # partial packets causing mixed up delimiters, remove buffer data up to last start delimiter
-                        data_buffer = data_buffer[start + len(HDLC.START):]
+            if callback is None:
+                break
+
+            Modem._run_callback(*callback)
+
+    @staticmethod
+    def _run_callback(callback, *args):
+        '''Call a user callback function on the callback thread.
+
+        Exceptions are printed to stderr like an uncaught thread exception, so one failing callback does not stop the callback thread.
+
+        Args:
+            callback (function): Function to call
+            args: Arguments to pass to the callback function
+        '''
+        try:
+            callback(*args)
+        except Exception:
+            traceback.print_exc()
+
+    def _io_loop(self):
+        '''Wait for data from the receive minimodem instance and pass it to the stdout or stderr handler.
+
+        A single thread services both subprocess pipes. Packets waiting for confidence data are released by the stderr handler, or here after 100 ms. The callback thread is stopped by this thread once it stops dispatching packets.
+        '''
+        callback_buffer = self._callback_buffer
+        selector = selectors.DefaultSelector()
+        selector.register(self._rx._process.stdout, selectors.EVENT_READ, self._process_rx_data)
+        selector.register(self._rx._process.stderr, selectors.EVENT_READ, self._process_stderr_data)
+        # reads land in a reusable buffer, the handlers copy what they keep into their own buffers
+        read_buffer = bytearray(4096)
+        read_view = memoryview(read_buffer)
+
+        while self.online and len(selector.get_map()) > 0:
+            timeout = None
+            if len(self._rx_pending) > 0:
+                # wake up when the oldest pending packet stops waiting for confidence data
+                timeout = max(0, self._rx_pending[0][1] - time.monotonic())
+
+            # blocks until data is available on either pipe
+            for key, events in selector.select(timeout):
+                # returns the available data without blocking
+                size = os.readv(key.fd, [read_buffer])
+
+                if size == 0:
+                    # pipe closed, subprocess stopped
+                    selector.unregister(key.fileobj)
                 else:
-                    if len(data_buffer) > max_data_buffer_len:
-                        # no end delimiter and buffer length over max packaet size, remove buffer data up to last start delimiter
-                        data_buffer = data_buffer[data_buffer.rfind(HDLC.START):]
-            else:
-                # avoid missing start delimiter split over multiple loop iterations
-                if len(data_buffer) > 10 * len(HDLC.START):
-                    data_buffer = b''
+                    key.data(read_view[:size])
 
+            # release pending packets with no confidence data after timeout
             #TODO test timeout duration on a slow platform (i.e Raspberry Pi)
-            # discard confidence data if older than 100 ms
-            if self._rx_confidence != 0 and self._rx_confidence_timestamp < (time.time() - 0.1):
-                self._rx_confidence = 0
-                self._rx_confidence_timestamp = 0
+            while len(self._rx_pending) > 0 and self._rx_pending[0][1] <= time.monotonic():
+                data, timeout = self._rx_pending.pop(0)
+                self._process_rx_callback(data, 0)
+
+        selector.close()
+        # no more packets will be dispatched by this loop, queued callbacks still run
+        callback_buffer.put(None)
+
+    def _receive_packet(self, data):
+        '''Call rx callback functions for a received packet, or hold the packet until confidence data is available.
+
+        Args:
+            data (bytes): received packet data
+        '''
+        #TODO test timeout duration on a slow platform (i.e Raspberry Pi)
+        # use confidence data if received within the last 100 ms
+        if self._rx_confidence_timestamp > time.monotonic() - 0.1:
+            self._process_rx_callback(data, self._rx_confidence)
+            # reset confidence data to avoid reuse
+            self._rx_confidence = 0
+            self._rx_confidence_timestamp = 0
+        else:
+            # wait up to 100 ms for confidence data
+            self._rx_pending.append((data, time.monotonic() + 0.1))
+
+    def _process_rx_data(self, data):
+        '''Add received bytes to the receive buffer and find data packets.
+
+        Packets are passed to the rx callback functions once complete.
+
+        Args:
+            data (bytes-like): data received from the receive subprocess stdout pipe
+        '''
+        if self._debug:
+            print(str(data, 'utf-8', errors='replace'), sep='', end='', flush=True)
+
+        # the buffer either starts with a start delimiter or holds data with no start delimiter
+        data_buffer = self._rx_buffer
+        data_buffer += data
+        # a partial packet longer than the MTU plus delimiters can never complete
+        max_data_buffer_len = self.MTU + 64
+        # avoid repeated attribute lookups while parsing
+        start_flag = HDLC.START
+        start_flag_len = len(start_flag)
+        stop_flag = HDLC.STOP
+        stop_flag_len = len(stop_flag)
+
+        # a single read may contain more than one packet
+        while True:
+            if not data_buffer.startswith(start_flag):
+                start = data_buffer.find(start_flag)
+                if start == -1:
+                    # keep only the bytes that could begin a start delimiter split over multiple reads
+                    if len(data_buffer) >= start_flag_len:
+                        del data_buffer[:len(data_buffer) - start_flag_len + 1]
+                    self._rx_scan = start_flag_len
+                    break
+
+                # remove buffer data before the start delimiter
+                del data_buffer[:start]
+                self._rx_scan = start_flag_len
+
+            # only search data that has not been searched for an end delimiter yet
+            end = data_buffer.find(stop_flag, self._rx_scan)
+            if end == -1 or end + stop_flag_len > max_data_buffer_len:
+                if len(data_buffer) < max_data_buffer_len:
+                    # an end delimiter may be split over multiple reads
+                    self._rx_scan = max(start_flag_len, len(data_buffer) - stop_flag_len + 1)
+                    break
+
+                # no end delimiter within max packet size, remove buffer data up to last start delimiter within max packet size,
+                # only the first max_data_buffer_len bytes are used so the same data is removed however the data was split into reads
+                start = data_buffer.rfind(start_flag, start_flag_len, max_data_buffer_len)
+                if start == -1:
+                    start = max_data_buffer_len
+                del data_buffer[:start]
+                self._rx_scan = start_flag_len
+                continue
 
-            # simmer down
-            time.sleep(0.001)
+            # delimiters found, drop empty packets and packets over max packet length without copying them
+            if 0 < end - start_flag_len <= self.MTU:
+                self._receive_packet(bytes(data_buffer[start_flag_len:end]))
+
+            # remove received data from buffer
+            del data_buffer[:end + stop_flag_len]
+            self._rx_scan = start_flag_len
 
     def _tx_loop(self):
         '''Process data in the transmit buffer.'''
+        data = None
+
         while self.online:
-            time.sleep(0.01) # 10 ms
-            
+            if data is None:
+                # blocks until data is available in the transmit buffer, None is put on stop
+                data = self._tx_buffer.get()
+                continue
+
             if self.carrier_sense:
+                # blocks until carrier is lost
+                self._carrier_clear.wait()
                 continue
 
             # process transmit buffer
-            if len(self._tx_buffer) > 0:
-                # random delay (100 - 250 ms) before transmitting to avoid collisions
-                time.sleep(random.uniform(0.10, 0.25))
-                
-                if self.carrier_sense:
+            # random delay (100 - 250 ms) before transmitting to avoid collisions,
+            # unless the channel has been quiet for more than 500 ms
+            if time.monotonic() - max(self._last_tx_end, self._last_carrier_seen) < 0.5:
+                # returns early if the modem is stopped
+                self._stopped.wait(random.uniform(0.10, 0.25))
+            
+                if self.carrier_sense or not self.online:
                     continue
 
-                # track bytes sent and start time
-                tx_bit_count = 0
-                tx_start_timestamp = time.time()
+            # restart the transmit subprocess if it exited since the data was sent
+            try:
+                self._start_tx()
+            except SubprocessError:
+                # drop the held data, the next transmission will try again
+                traceback.print_exc()
+                data = None
+                continue
+
+            if not self.online:
+                # stopped during the backoff or subprocess start, do not key up
+                continue
+
+            # track bytes sent and start time
+            tx_bit_count = 0
+            tx_start_timestamp = time.monotonic()
+            self._toggle_ptt()
+
+            # 100 ms, returns early if the modem is stopped
+            if self._stopped.wait(0.1):
+                # release PTT without sending
+                self._toggle_ptt()
+                continue
+            
+            # collect held data and any other data in the transmit buffer
+            tx_data = []
+            while data is not None:
+                if self._debug:
+                    print('TX: ' + data.decode('utf-8', errors='replace'))
+
+                tx_data.append(data)
+                tx_bit_count += len(data) * 8
+
+                try:
+                    data = self._tx_buffer.get_nowait()
+                except queue.Empty:
+                    data = None
+
+            # send all collected data with a single write
+            try:
+                self._tx.send_many(tx_data)
+            except BrokenPipeError:
+                # transmit subprocess stopped while sending, release PTT
                 self._toggle_ptt()
-                time.sleep(0.1) # 100 ms
-                
-                while len(self._tx_buffer) > 0:
-                    data = self._tx_buffer.pop(0)
 
-                    if self._debug:
-                        print('TX: ' + data.decode('utf-8'))
+                if self.online:
+                    # exited unexpectedly, report it and clear online so the next transmission restarts the subprocess
+                    traceback.print_exc()
+                    with self._tx_lock:
+                        self._tx.stop()
 
-                    self._tx.send(data)
-                    tx_bit_count += len(data) * 8
+                continue
 
-                # calculate duration of transmission based on number of bits sent
-                if self.sync_byte is not None:
-                    # minimodem adds 16 leading sync bytes, plus start and stop bytes for each sync byte
-                    tx_bit_count += 16 * (8 + 2)
+            # calculate duration of transmission based on number of bits sent
+            if self.sync_byte is not None:
+                # minimodem adds 16 leading sync bytes, plus start and stop bytes for each sync byte
+                tx_bit_count += 16 * (8 + 2)
 
-                # bits sent / baudrate = transmit time in seconds
-                tx_duration = tx_bit_count / self.baudrate
-                # 1.3x mupltiplier necessary to align with actual transmit duration
-                tx_duration *= 1.3
-                # 0.5 sec ptt tail
-                tx_duration += 0.5
+            # bits sent / baudrate = transmit time in seconds
+            tx_duration = tx_bit_count / self.baudrate
+            # mupltiplier (default 1.3x) necessary to align with actual transmit duration
+            tx_duration *= self._tx_calibration
+            # 0.5 sec ptt tail
+            tx_duration += 0.5
 
-                tx_end_timestamp = tx_start_timestamp + tx_duration
+            tx_end_timestamp = tx_start_timestamp + tx_duration
+            
+            # wait out the rest of the transmission in a single wait, release PTT early if the modem is stopped
+            tx_remaining = tx_end_timestamp - time.monotonic()
+            if tx_remaining > 0:
+                self._stopped.wait(tx_remaining)
                 
-                while time.time() < tx_end_timestamp:
-                    time.sleep(0.1) # 100 ms
-                    
-                self._toggle_ptt()
+            self._toggle_ptt()
+            self._last_tx_end = time.monotonic()
 
-                if self._debug:
-                    duration = tx_end_timestamp - tx_start_timestamp
-                    print('{} bits at {} bps     tx duration: {} s'.format(tx_bit_count, self.baudrate, tx_duration))
+            if self._debug:
+                duration = tx_end_timestamp - tx_start_timestamp
+                print('{} bits at {} bps     tx duration: {} s'.format(tx_bit_count, self.baudrate, tx_duration))
 
 
-    def _stderr_loop(self):
-        '''Receive stderr data from the MiniModem process into a buffer and identify carrier events.
+    def _process_stderr_data(self, data):
+        '''Add received stderr bytes to the stderr buffer and identify carrier events.
 
-        The carrier sense property is set (True/False) depending on the type of event received (CARRIER or NOCARRIER).
+        The carrier sense property is set (True/False) depending on the type of event received (CARRIER or NOCARRIER). Confidence data from a NOCARRIER event is passed to any packets waiting for it.
+
+        Args:
+            data (bytes-like): data received from the receive subprocess stderr pipe
         '''
-        stderr_buffer = b''
+        stderr_buffer = self._stderr_buffer
+        stderr_buffer += data
         carrier_event_symbol = b'###'
+        carrier_event_symbol_len = len(carrier_event_symbol)
+
+        # a single read may contain more than one carrier event
+        while True:
+            carrier_event_start = stderr_buffer.find(carrier_event_symbol)
+            if carrier_event_start < 0:
+                # keep only the bytes that could begin a symbol split over multiple reads
+                if len(stderr_buffer) >= carrier_event_symbol_len:
+                    del stderr_buffer[:len(stderr_buffer) - carrier_event_symbol_len + 1]
+                break
+
+            # remove buffer data before the carrier event
+            del stderr_buffer[:carrier_event_start]
+            carrier_event_end = stderr_buffer.find(carrier_event_symbol, carrier_event_symbol_len)
+            if carrier_event_end < 0:
+                # wait for the rest of the carrier event
+                break
+
+            # capture carrier event text
+            carrier_event = bytes(stderr_buffer[carrier_event_symbol_len:carrier_event_end]).strip()
+            # remove carrier event text from buffer
+            del stderr_buffer[:carrier_event_end + carrier_event_symbol_len]
+
+            # set carrier sense state
+            if carrier_event.startswith(b'CARRIER'):
+                self.carrier_sense = True
+                self._carrier_clear.clear()
+                self._last_carrier_seen = time.monotonic()
+            elif carrier_event.startswith(b'NOCARRIER'):
+                self.carrier_sense = False
+                self._carrier_clear.set()
+                self._last_carrier_seen = time.monotonic()
+
+                # find confidence data in no-carrier event (ex. 'confidence=2.157')
+                confidence_start = carrier_event.find(b'confidence=')
+                if confidence_start >= 0:
+                    confidence_start += len(b'confidence=')
+                    confidence_end = carrier_event.find(b' ', confidence_start)
+                    if confidence_end < 0:
+                        confidence_end = len(carrier_event)
+
+                    # try to record confidence data
+                    try:
+                        self._rx_confidence = float(carrier_event[confidence_start:confidence_end])
+                        self._rx_confidence_timestamp = time.monotonic()
+                    except ValueError:
+                        # discard on failure to cast to float
+                        pass
+
+                if self._rx_confidence_timestamp != 0 and len(self._rx_pending) > 0:
+                    # release packets waiting for confidence data
+                    for data, timeout in self._rx_pending:
+                        self._process_rx_callback(data, self._rx_confidence)
+
+                    self._rx_pending = []
+                    # reset confidence data to avoid reuse
+                    self._rx_confidence = 0
+                    self._rx_confidence_timestamp = 0
 
-        while self.online:
-            # blocks until next character received
-            stderr_buffer += self._rx.get_stderr()
-            
-            # detect carrier event
-            if carrier_event_symbol in stderr_buffer:
-                carrier_event_start = stderr_buffer.find(carrier_event_symbol) + len(carrier_event_symbol)
-                carrier_event_end = stderr_buffer.find(carrier_event_symbol, carrier_event_start)
-                if carrier_event_end > 0:
-                    # capture carrier event text
-                    carrier_event = stderr_buffer[carrier_event_start:carrier_event_end].strip()
-                    # remove carrier event text from buffer
-                    stderr_buffer = stderr_buffer[carrier_event_end + len(carrier_event_symbol):]
-
-                    carrier_event_data  = carrier_event.split(b' ')
-                    carrier_event_type = carrier_event_data[0]
-
-                    # set carrier sense state
-                    if carrier_event_type == b'CARRIER':
-                        self.carrier_sense = True
-                    elif carrier_event_type == b'NOCARRIER':
-                        self.carrier_sense = False
-
-                        # find confidence data in no-carrier event
-                        for data in carrier_event_data:
-                            if b'confidence' in data:
-                                carrier_confidence = data.split(b'=')
-                                carrier_confidence = carrier_confidence[1]
-                                break
-
-                        # try to decode and record confidence data
-                        try:
-                            carrier_confidence = float(carrier_confidence.decode('utf-8'))
-                            self._rx_confidence = carrier_confidence
-                            self._rx_confidence_timestamp = time.time()
-                        except:
-                            # discard on failure to decode or cast to float
-                            pass
-
-            else:
-                # avoid missing symbol split over multiple loop iterations
-                if len(stderr_buffer) > 2 * len(carrier_event_symbol):
-                    stderr_buffer = b''
-
-            # simmer down
-            time.sleep(0.001)
-            
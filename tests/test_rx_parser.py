@@ -0,0 +1,148 @@
+'''Receive framing and carrier event parsing tests.
+
+The stdout and stderr handlers are fed directly on a modem that is not started, so minimodem is not required.
+
+Run with `python -m unittest tests/test_rx_parser.py` from the repository root.
+'''
+
+import random
+import unittest
+
+import fskmodem
+from fskmodem import HDLC
+
+
+class EventRecorder:
+    '''Stand-in for the carrier clear event that records carrier state changes.'''
+
+    def __init__(self):
+        self.events = []
+
+    def set(self):
+        self.events.append('NOCARRIER')
+
+    def clear(self):
+        self.events.append('CARRIER')
+
+
+def new_modem():
+    '''Create a modem that is not started and collects received packets.'''
+    modem = fskmodem.Modem(start=False)
+    modem.packets = []
+    modem._receive_packet = modem.packets.append
+    modem._carrier_clear = EventRecorder()
+    return modem
+
+def whole(data):
+    return [data]
+
+def byte_by_byte(data):
+    return [data[i:i + 1] for i in range(len(data))]
+
+def random_chunks(data, seed):
+    rng = random.Random(seed)
+    chunks = []
+    i = 0
+    while i < len(data):
+        size = rng.randint(1, 8)
+        chunks.append(data[i:i + size])
+        i += size
+    return chunks
+
+def splits(data):
+    '''Yield the same stream split several ways.'''
+    yield whole(data)
+    yield byte_by_byte(data)
+    for seed in range(20):
+        yield random_chunks(data, seed)
+
+def frame(data):
+    return HDLC.START + data + HDLC.STOP
+
+
+class TestRxFraming(unittest.TestCase):
+
+    def assertPackets(self, stream, expected):
+        for chunks in splits(stream):
+            modem = new_modem()
+            for chunk in chunks:
+                modem._process_rx_data(memoryview(chunk))
+
+            self.assertEqual(modem.packets, expected, 'chunks: {}'.format(chunks))
+
+    def test_single_packet(self):
+        self.assertPackets(b'noise' + frame(b'hello') + b'noise', [b'hello'])
+
+    def test_start_split_across_reads(self):
+        self.assertPackets(b'x' * 50 + HDLC.START[:1], [])
+        # more unframed data than the old trim threshold before a split start delimiter
+        self.assertPackets(b'x' * 50 + frame(b'hello'), [b'hello'])
+
+    def test_stop_split_across_reads(self):
+        self.assertPackets(HDLC.START + b'hello' + HDLC.STOP[:1], [])
+        self.assertPackets(HDLC.START + b'hello' + HDLC.STOP[:1] + b'x' + HDLC.STOP, [b'hello' + HDLC.STOP[:1] + b'x'])
+
+    def test_back_to_back_packets(self):
+        self.assertPackets(frame(b'one') + frame(b'two') + frame(b'three'), [b'one', b'two', b'three'])
+
+    def test_empty_packet_dropped(self):
+        self.assertPackets(frame(b'') + frame(b'next'), [b'next'])
+
+    def test_mtu_packets(self):
+        mtu = new_modem().MTU
+        self.assertPackets(frame(b'a' * mtu), [b'a' * mtu])
+        self.assertPackets(frame(b'a' * (mtu + 1)) + frame(b'next'), [b'next'])
+        # a partial packet that can never complete does not block the next packet
+        self.assertPackets(HDLC.START + b'a' * (2 * mtu) + frame(b'next'), [b'next'])
+
+    def test_random_streams(self):
+        rng = random.Random(0)
+        # noise and packet data without delimiter characters
+        alphabet = b'abc xyz<>'
+        for _ in range(200):
+            stream = b''
+            expected = []
+            for _ in range(rng.randint(1, 6)):
+                stream += bytes(rng.choice(b'abc xyz') for _ in range(rng.randint(0, 40)))
+                data = bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+                # delimiters cannot appear inside packet data
+                data = data.replace(HDLC.STOP, b'').replace(HDLC.START, b'').strip(b'<>') or b'a'
+                stream += frame(data)
+                expected.append(data)
+
+            self.assertPackets(stream, expected)
+
+
+class TestCarrierEvents(unittest.TestCase):
+
+    CARRIER = b'### CARRIER 300 @ 1270.0 Hz ###\n'
+    NOCARRIER = b'### NOCARRIER ndata=14 confidence=3.250 ampl=0.5 bps=300.00 (rate perfect) ###\n'
+
+    def assertEvents(self, stream, expected, confidence):
+        for chunks in splits(stream):
+            modem = new_modem()
+            for chunk in chunks:
+                modem._process_stderr_data(memoryview(chunk))
+
+            self.assertEqual(modem._carrier_clear.events, expected, 'chunks: {}'.format(chunks))
+            self.assertEqual(modem.carrier_sense, expected[-1] == 'CARRIER' if len(expected) > 0 else False)
+            self.assertEqual(modem._rx_confidence, confidence)
+
+    def test_carrier(self):
+        self.assertEvents(b'noise' + self.CARRIER, ['CARRIER'], 0)
+
+    def test_carrier_then_no_carrier(self):
+        self.assertEvents(self.CARRIER + b'noise\n' + self.NOCARRIER, ['CARRIER', 'NOCARRIER'], 3.25)
+
+    def test_back_to_back_events(self):
+        self.assertEvents(self.CARRIER + self.NOCARRIER + self.CARRIER, ['CARRIER', 'NOCARRIER', 'CARRIER'], 3.25)
+
+    def test_partial_event(self):
+        self.assertEvents(self.CARRIER + self.NOCARRIER[:-5], ['CARRIER'], 0)
+
+    def test_symbol_after_noise(self):
+        self.assertEvents(b'#' * 2 + b'x' * 50 + b'# ' + self.CARRIER, ['CARRIER'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()